@@ -22,7 +22,7 @@ from PySide6.QtGui import QIcon, QColor, QFont
 from shared.networking.server import ProctoringServer
 from shared.networking.protocol import Message, MessageType
 from shared.database.database_manager import DatabaseManager
-from shared.database.models import ViolationType, ViolationSeverity, PermissionStatus, ExamSession
+from shared.database.models import ViolationType, ViolationSeverity, PermissionStatus, ExamSession, ExamSessionStatus
 from shared.utils.config_loader import ConfigLoader
 from shared.utils.system_utils import SystemUtils
 
@@ -240,7 +240,7 @@ class AdminApp(QMainWindow):
         self.violation_filter_type = QComboBox()
         self.violation_filter_type.addItem("Semua Jenis")
         for vtype in ViolationType:
-            self.violation_filter_type.addItem(vtype.value)
+            self.violation_filter_type.addItem(vtype.slug)
         filters_layout.addWidget(QLabel("Jenis:"))
         filters_layout.addWidget(self.violation_filter_type)
         
@@ -473,7 +473,7 @@ class AdminApp(QMainWindow):
                 with self.db_manager.get_session() as session:
                     exam_session = ExamSession(
                         name=name,
-                        status='active'
+                        status=ExamSessionStatus.ACTIVE
                     )
                     session.add(exam_session)
                     session.flush()
@@ -496,7 +496,7 @@ class AdminApp(QMainWindow):
                     with self.db_manager.get_session() as session:
                         session_obj = self.db_manager.get_exam_session(self.current_session_id)
                         if session_obj:
-                            session_obj.status = 'completed'
+                            session_obj.status = ExamSessionStatus.COMPLETED
                             session_obj.end_time = datetime.utcnow()
                             session.add(session_obj)
                 self.current_session = None
@@ -531,8 +531,8 @@ class AdminApp(QMainWindow):
     def _handle_violation_report(self, participant_id: str, message: Message):
         """Handle violation report"""
         data = message.data
-        violation_type = ViolationType(data.get('violation_type', 'application_blocked'))
-        severity = ViolationSeverity(data.get('severity', 'medium'))
+        violation_type = ViolationType.from_slug(data.get('violation_type', 'application_blocked'))
+        severity = ViolationSeverity.from_slug(data.get('severity', 'medium'))
         
         # Create violation record
         if self.current_session_id:
@@ -696,7 +696,7 @@ class AdminApp(QMainWindow):
                 violations_data.append({
                     'id': v.id,
                     'timestamp': v.timestamp.strftime("%H:%M:%S") if v.timestamp else "",
-                    'violation_type': v.violation_type.value if v.violation_type else "",
+                    'violation_type': ViolationType.describe(v.violation_type) if v.violation_type else "",
                     'description': v.description or "",
                     'participant_id': v.participant_id,
                     'participant_name': v.participant.name if v.participant else f"ID:{v.participant_id}"
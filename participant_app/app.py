@@ -428,9 +428,10 @@ class ParticipantApp(QMainWindow):
     
     def _on_violation_detected(self, violation: Dict):
         """Handle violation dari AI detection"""
-        # Capture evidence
+        # Capture evidence di pool I/O supaya callback ini tidak ikut
+        # menunggu grab + encode screenshot
         violation_id = f"violation_{datetime.utcnow().timestamp()}"
-        evidence = self.evidence_capture.capture_violation_evidence(
+        self.evidence_capture.submit_violation_evidence(
             violation_id, violation['type']
         )
         
@@ -127,6 +127,7 @@ class CameraDetector:
         self.face_count_history = deque(maxlen=60)  # Last 60 frames
         self.movement_history = deque(maxlen=300)  # Last 5 minutes at 1fps
         self.is_running = False
+        self.idle = False
         self.cap = None
         self.lock = threading.Lock()
         
@@ -235,7 +236,13 @@ class CameraDetector:
                 if not ret:
                     time.sleep(0.1)
                     continue
-                
+
+                if self.idle:
+                    # Mode idle (mis. saat izin leave-seat aktif): frame tetap
+                    # diambil agar buffer kamera segar, tapi inference di-skip
+                    time.sleep(0.1)
+                    continue
+
                 if not self.mediapipe_available:
                     time.sleep(0.1)
                     continue
@@ -362,6 +369,25 @@ class CameraDetector:
                 movements_per_minute = movements * (60.0 / len(recent_movements))
                 self.suspicious_movement = movements_per_minute > self.suspicious_movement_threshold
     
+    def set_idle(self, idle: bool):
+        """
+        Set mode idle: skip inference tapi tetap grab frame
+
+        Dipakai saat permission aktif supaya CPU/GPU tidak terbuang
+        untuk hasil yang akan difilter.
+        """
+        self.idle = idle
+        if idle:
+            # Reset semua flag violation: selama idle _process_detections
+            # tidak jalan, jadi flag yang kebetulan True saat permission
+            # diberikan (mis. suspicious_movement karena peserta berdiri)
+            # akan beku dan memicu violation palsu tiap tick
+            with self.lock:
+                self.face_absence_start = None
+                self.face_absent = False
+                self.multiple_faces = False
+                self.suspicious_movement = False
+
     def get_detection_results(self) -> Dict:
         """
         Get current detection results
@@ -2,12 +2,33 @@
 Manager untuk mengkoordinasikan semua AI detection
 """
 from typing import Dict, Optional, Callable
+from concurrent.futures import ThreadPoolExecutor
 from .camera_detector import CameraDetector
 from .audio_detector import AudioDetector
 from datetime import datetime
 import json
 
 
+# Aturan violation berbasis data: (flag_key, type, severity, template).
+# Template hanya dipanggil saat rule-nya kena, jadi biaya format f-string
+# cuma dibayar untuk violation yang benar-benar terjadi.
+_CAMERA_RULES = (
+    ('face_absent', 'face_absence', 'medium',
+     lambda r: f"Face tidak terdeteksi selama {r.get('face_absence_duration', 0):.1f} detik"),
+    ('multiple_faces', 'multiple_faces', 'high',
+     lambda r: f"Terdeteksi {r.get('face_count', 0)} wajah dalam frame"),
+    ('suspicious_movement', 'suspicious_movement', 'medium',
+     lambda r: "Terdeteksi gerakan kepala yang mencurigakan"),
+)
+
+_AUDIO_RULES = (
+    ('voice_activity', 'voice_activity', 'medium',
+     lambda r: f"Terdeteksi aktivitas suara (level: {r.get('voice_activity_level', 0):.2f})"),
+    ('multiple_speakers', 'multiple_speakers', 'high',
+     lambda r: "Terdeteksi kemungkinan multiple speakers"),
+)
+
+
 class DetectionManager:
     """Manager untuk AI detection"""
     
@@ -20,42 +41,71 @@ class DetectionManager:
         """
         self.config = config or {}
         self.ai_config = self.config.get('ai_proctoring', {})
-        
-        # Initialize detectors
+
+        # Detector dibuat lazy di start(): konstruksinya memuat model
+        # (ratusan ms) dan tidak perlu memblok startup GUI
         self.camera_detector = None
         self.audio_detector = None
+        self._camera_enabled = self.ai_config.get('camera', {}).get('enabled', True)
+        self._audio_enabled = self.ai_config.get('audio', {}).get('enabled', True)
         
-        if self.ai_config.get('camera', {}).get('enabled', True):
-            self.camera_detector = CameraDetector(
-                camera_index=0,
-                config=self.ai_config.get('camera', {})
-            )
-        
-        if self.ai_config.get('audio', {}).get('enabled', True):
-            self.audio_detector = AudioDetector(
-                config=self.ai_config.get('audio', {})
-            )
-        
+        # TurboJPEG encoder (lazy, optional) untuk encode screenshot evidence
+        self._turbojpeg = None
+        self._turbojpeg_checked = False
+
         # Callbacks
         self.violation_callback: Optional[Callable] = None
         
         # Permission state
         self.permission_active = False
         self.permission_expires_at = None
-    
+
+        # Pool untuk fetch hasil kedua detector secara paralel; snapshot
+        # camera bisa tertahan lock selama inference, jadi paralel memotong
+        # latensi tick dari Lc+La menjadi max(Lc, La)
+        self._detector_pool: Optional[ThreadPoolExecutor] = None
+
     def start(self):
-        """Start all detectors"""
+        """Start all detectors (konstruksi model berjalan paralel)"""
+        self._init_detectors()
+        if self.camera_detector and self.audio_detector and not self._detector_pool:
+            self._detector_pool = ThreadPoolExecutor(
+                max_workers=2, thread_name_prefix='detection'
+            )
         if self.camera_detector:
             self.camera_detector.start()
         if self.audio_detector:
             self.audio_detector.start()
-    
+
+    def _init_detectors(self):
+        """Buat detector yang belum ada; dua load model berjalan overlap"""
+        need_camera = self._camera_enabled and self.camera_detector is None
+        need_audio = self._audio_enabled and self.audio_detector is None
+        if not (need_camera or need_audio):
+            return
+
+        with ThreadPoolExecutor(max_workers=2, thread_name_prefix='detector-init') as ex:
+            camera_future = ex.submit(
+                CameraDetector, 0, self.ai_config.get('camera', {})
+            ) if need_camera else None
+            audio_future = ex.submit(
+                AudioDetector, self.ai_config.get('audio', {})
+            ) if need_audio else None
+
+            if camera_future:
+                self.camera_detector = camera_future.result()
+            if audio_future:
+                self.audio_detector = audio_future.result()
+
     def stop(self):
         """Stop all detectors"""
         if self.camera_detector:
             self.camera_detector.stop()
         if self.audio_detector:
             self.audio_detector.stop()
+        if self._detector_pool:
+            self._detector_pool.shutdown(wait=False)
+            self._detector_pool = None
     
     def set_violation_callback(self, callback: Callable):
         """Set callback untuk violation detection"""
@@ -65,6 +115,10 @@ class DetectionManager:
         """Set permission state (untuk pause detection saat leave seat)"""
         self.permission_active = active
         self.permission_expires_at = expires_at
+        # Saat permission aktif, camera detector masuk mode idle
+        # (skip inference) daripada membuang hasil yang difilter
+        if self.camera_detector:
+            self.camera_detector.set_idle(active)
     
     def check_permission_expired(self) -> bool:
         """Check if permission has expired"""
@@ -73,8 +127,11 @@ class DetectionManager:
         
         if self.permission_expires_at and datetime.utcnow() > self.permission_expires_at:
             self.permission_active = False
+            # Watchdog: keluar dari mode idle begitu permission habis
+            if self.camera_detector:
+                self.camera_detector.set_idle(False)
             return True
-        
+
         return False
     
     def get_all_detections(self) -> Dict:
@@ -98,70 +155,65 @@ class DetectionManager:
         # Skip detection jika permission active (untuk face absence)
         skip_face_absence = self.permission_active
         
-        # Camera detections
-        if self.camera_detector:
-            camera_results = self.camera_detector.get_detection_results()
+        # Ambil snapshot kedua detector; paralel kalau dua-duanya aktif
+        camera_results = audio_results = None
+        if self._detector_pool and self.camera_detector and self.audio_detector:
+            camera_future = self._detector_pool.submit(
+                self.camera_detector.get_detection_results
+            )
+            audio_future = self._detector_pool.submit(
+                self.audio_detector.get_detection_results
+            )
+            camera_results = camera_future.result()
+            audio_results = audio_future.result()
+        else:
+            if self.camera_detector:
+                camera_results = self.camera_detector.get_detection_results()
+            if self.audio_detector:
+                audio_results = self.audio_detector.get_detection_results()
+
+        # Camera detections (skip face absence jika ada permission)
+        if camera_results is not None:
             results['camera'] = camera_results
-            
-            # Check violations (skip face absence jika ada permission)
-            if not skip_face_absence and camera_results.get('face_absent'):
-                violation = {
-                    'type': 'face_absence',
-                    'severity': 'medium',
-                    'description': f"Face tidak terdeteksi selama {camera_results.get('face_absence_duration', 0):.1f} detik"
-                }
-                results['violations'].append(violation)
-                if self.violation_callback:
-                    self.violation_callback(violation)
-            
-            if camera_results.get('multiple_faces'):
-                violation = {
-                    'type': 'multiple_faces',
-                    'severity': 'high',
-                    'description': f"Terdeteksi {camera_results.get('face_count', 0)} wajah dalam frame"
-                }
-                results['violations'].append(violation)
-                if self.violation_callback:
-                    self.violation_callback(violation)
-            
-            if camera_results.get('suspicious_movement'):
-                violation = {
-                    'type': 'suspicious_movement',
-                    'severity': 'medium',
-                    'description': "Terdeteksi gerakan kepala yang mencurigakan"
-                }
-                results['violations'].append(violation)
-                if self.violation_callback:
-                    self.violation_callback(violation)
-        
+            self._apply_rules(
+                _CAMERA_RULES, camera_results, results['violations'],
+                skip=('face_absent',) if skip_face_absence else ()
+            )
+
         # Audio detections
-        if self.audio_detector:
-            audio_results = self.audio_detector.get_detection_results()
+        if audio_results is not None:
             results['audio'] = audio_results
-            
-            # Check violations
-            if audio_results.get('voice_activity'):
-                violation = {
-                    'type': 'voice_activity',
-                    'severity': 'medium',
-                    'description': f"Terdeteksi aktivitas suara (level: {audio_results.get('voice_activity_level', 0):.2f})"
-                }
-                results['violations'].append(violation)
-                if self.violation_callback:
-                    self.violation_callback(violation)
-            
-            if audio_results.get('multiple_speakers'):
-                violation = {
-                    'type': 'multiple_speakers',
-                    'severity': 'high',
-                    'description': "Terdeteksi kemungkinan multiple speakers"
-                }
-                results['violations'].append(violation)
-                if self.violation_callback:
-                    self.violation_callback(violation)
-        
+            self._apply_rules(_AUDIO_RULES, audio_results, results['violations'])
+
         return results
+
+    def _apply_rules(self, rules, detection_results: Dict, violations: list,
+                     skip: tuple = ()):
+        """Evaluasi tabel rule terhadap hasil detection"""
+        callback = self.violation_callback
+        for key, vtype, severity, template in rules:
+            if key in skip or not detection_results.get(key):
+                continue
+            violation = {
+                'type': vtype,
+                'severity': severity,
+                'description': template(detection_results)
+            }
+            violations.append(violation)
+            if callback:
+                callback(violation)
     
+    def _get_turbojpeg(self):
+        """Ambil encoder TurboJPEG (None jika library tidak tersedia)"""
+        if not self._turbojpeg_checked:
+            self._turbojpeg_checked = True
+            try:
+                from turbojpeg import TurboJPEG
+                self._turbojpeg = TurboJPEG()
+            except Exception:
+                self._turbojpeg = None
+        return self._turbojpeg
+
     def capture_evidence(self, evidence_dir: str) -> Dict:
         """
         Capture evidence (screenshot, video, audio)
@@ -183,9 +235,17 @@ class DetectionManager:
         if self.camera_detector:
             frame = self.camera_detector.capture_frame()
             if frame is not None:
-                import cv2
                 screenshot_path = os.path.join(evidence_dir, f"screenshot_{timestamp}.jpg")
-                cv2.imwrite(screenshot_path, frame)
+                encoder = self._get_turbojpeg()
+                if encoder is not None:
+                    # TurboJPEG pakai SIMD untuk RGB->YCbCr + DCT,
+                    # biasanya 2-4x lebih cepat dari libjpeg bawaan cv2
+                    Path(screenshot_path).write_bytes(
+                        encoder.encode(frame, quality=80)
+                    )
+                else:
+                    import cv2
+                    cv2.imwrite(screenshot_path, frame)
                 evidence['screenshot'] = screenshot_path
         
         # Capture audio
@@ -4,9 +4,12 @@ Database manager untuk operasi database
 import os
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker, Session
+from sqlalchemy.sql import func
 from sqlalchemy.exc import SQLAlchemyError
-from contextlib import contextmanager
-from .models import Base, ExamSession, Participant, Violation, Evidence, PermissionRequest
+from contextlib import contextmanager, suppress
+from .models import (Base, ExamSession, ExamSessionStatus, Participant,
+                     Violation, Evidence, PermissionRequest, PermissionStatus,
+                     pack_blob)
 from datetime import datetime, timedelta
 from typing import Optional, List
 
@@ -29,7 +32,12 @@ class DatabaseManager:
         # Prevent SQLAlchemy from expiring ORM objects on commit so returned
         # instances remain usable after the session context closes.
         self.SessionLocal = sessionmaker(bind=self.engine, expire_on_commit=False)
-        
+
+        # Async engine dibuat lazy (butuh aiosqlite) supaya pemakai sync
+        # tidak perlu dependency tambahan
+        self._async_engine = None
+        self._async_sessionmaker = None
+
         # Create tables
         Base.metadata.create_all(self.engine)
     
@@ -46,14 +54,70 @@ class DatabaseManager:
         finally:
             session.close()
     
+    def _get_async_sessionmaker(self):
+        """Buat async engine + sessionmaker secara lazy (butuh aiosqlite)"""
+        if self._async_sessionmaker is None:
+            from sqlalchemy.ext.asyncio import (async_sessionmaker,
+                                                create_async_engine)
+            self._async_engine = create_async_engine(
+                f'sqlite+aiosqlite:///{self.db_path}', echo=False
+            )
+            self._async_sessionmaker = async_sessionmaker(
+                self._async_engine, expire_on_commit=False
+            )
+        return self._async_sessionmaker
+
+    async def a_create_violation(self, participant_id: str, exam_session_id: int,
+                                 violation_type, severity,
+                                 description: str = None) -> Violation:
+        """Versi async create_violation: tidak memblok event loop server"""
+        from sqlalchemy import select
+
+        ASession = self._get_async_sessionmaker()
+        async with ASession() as session:
+            async with session.begin():
+                result = await session.execute(
+                    select(Participant).filter_by(participant_id=participant_id)
+                )
+                participant = result.scalars().first()
+                if not participant:
+                    raise ValueError(f"Participant {participant_id} not found")
+
+                violation = Violation(
+                    participant_id=participant.id,
+                    exam_session_id=exam_session_id,
+                    violation_type=violation_type,
+                    severity=severity,
+                    description=description
+                )
+                session.add(violation)
+                participant.violation_count += 1
+            await session.refresh(violation)
+            return violation
+
+    async def a_update_participant_heartbeat(self, participant_id: str):
+        """Versi async update_participant_heartbeat"""
+        from sqlalchemy import select
+
+        ASession = self._get_async_sessionmaker()
+        async with ASession() as session:
+            async with session.begin():
+                result = await session.execute(
+                    select(Participant).filter_by(participant_id=participant_id)
+                )
+                participant = result.scalars().first()
+                if participant:
+                    participant.last_heartbeat = func.current_timestamp()
+                    participant.is_active = True
+
     # Exam Session Operations
-    def create_exam_session(self, name: str, config: str = None) -> ExamSession:
-        """Buat sesi ujian baru"""
+    def create_exam_session(self, name: str, config=None) -> ExamSession:
+        """Buat sesi ujian baru (config boleh dict atau string JSON)"""
         with self.get_session() as session:
             exam_session = ExamSession(
                 name=name,
-                config=config,
-                status='active'
+                config=pack_blob(config),
+                status=ExamSessionStatus.ACTIVE
             )
             session.add(exam_session)
             session.flush()
@@ -63,12 +127,14 @@ class DatabaseManager:
     def get_exam_session(self, session_id: int) -> Optional[ExamSession]:
         """Ambil sesi ujian berdasarkan ID"""
         with self.get_session() as session:
-            return session.query(ExamSession).filter_by(id=session_id).first()
+            # Lookup by primary key: session.get() cek identity map dulu
+            # dan skip konstruksi Query
+            return session.get(ExamSession, session_id)
     
     def get_active_exam_session(self) -> Optional[ExamSession]:
         """Ambil sesi ujian yang aktif"""
         with self.get_session() as session:
-            return session.query(ExamSession).filter_by(status='active').first()
+            return session.query(ExamSession).filter_by(status=ExamSessionStatus.ACTIVE).first()
     
     # Participant Operations
     def register_participant(self, participant_id: str, name: str, 
@@ -96,7 +162,9 @@ class DatabaseManager:
                 participant_id=participant_id
             ).first()
             if participant:
-                participant.last_heartbeat = datetime.utcnow()
+                # Biarkan SQLite yang menghitung timestamp, tanpa alokasi
+                # objek datetime di Python per heartbeat
+                participant.last_heartbeat = func.current_timestamp()
                 participant.is_active = True
     
     def get_participant(self, participant_id: str) -> Optional[Participant]:
@@ -192,7 +260,7 @@ class DatabaseManager:
     # Evidence Operations
     def create_evidence(self, violation_id: int, evidence_type: str,
                        file_path: str, file_size: int = None,
-                       metadata: str = None) -> Evidence:
+                       metadata=None) -> Evidence:
         """Buat record evidence baru"""
         with self.get_session() as session:
             evidence = Evidence(
@@ -200,7 +268,7 @@ class DatabaseManager:
                 evidence_type=evidence_type,
                 file_path=file_path,
                 file_size=file_size,
-                evidence_metadata=metadata
+                evidence_metadata=pack_blob(metadata)
             )
             session.add(evidence)
             session.flush()
@@ -224,7 +292,7 @@ class DatabaseManager:
                 request_type=request_type,
                 duration_minutes=duration_minutes,
                 reason=reason,
-                status='pending'
+                status=PermissionStatus.PENDING
             )
             session.add(request)
             session.flush()
@@ -234,9 +302,10 @@ class DatabaseManager:
     def approve_permission_request(self, request_id: int) -> bool:
         """Approve permintaan izin"""
         with self.get_session() as session:
-            request = session.query(PermissionRequest).filter_by(id=request_id).first()
-            if request and request.status.value == 'pending':
-                request.status = 'approved'
+            request = session.get(PermissionRequest, request_id)
+            # Bandingkan identitas enum langsung, bukan string .value
+            if request and request.status == PermissionStatus.PENDING:
+                request.status = PermissionStatus.APPROVED
                 request.approved_at = datetime.utcnow()
                 request.expires_at = datetime.utcnow() + timedelta(minutes=request.duration_minutes)
                 return True
@@ -254,7 +323,7 @@ class DatabaseManager:
             
             return session.query(PermissionRequest).filter_by(
                 participant_id=participant.id,
-                status='approved'
+                status=PermissionStatus.APPROVED
             ).filter(
                 PermissionRequest.expires_at > datetime.utcnow()
             ).first()
@@ -269,11 +338,9 @@ class DatabaseManager:
             ).all()
             
             for evidence in old_evidence:
-                # Delete file if exists
-                if os.path.exists(evidence.file_path):
-                    try:
-                        os.remove(evidence.file_path)
-                    except:
-                        pass
-                
+                # Unlink langsung (EAFP): satu syscall per file, tanpa
+                # os.path.exists yang menambah stat() terpisah
+                with suppress(FileNotFoundError, OSError):
+                    os.unlink(evidence.file_path)
+
                 session.delete(evidence)
@@ -1,58 +1,153 @@
 """
 Database models untuk sistem proctoring
 """
-from datetime import datetime
-from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime, Text, ForeignKey, Enum
+from sqlalchemy import (Column, Integer, SmallInteger, String, Float, Boolean,
+                        DateTime, Text, LargeBinary, ForeignKey, Enum)
 from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 import enum
+import json
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
 
 Base = declarative_base()
 
 
-class ViolationType(enum.Enum):
+def pack_blob(obj):
+    """
+    Serialize config/metadata ke bytes untuk kolom LargeBinary
+
+    Pakai msgpack kalau tersedia (parse ~3x lebih cepat dan lebih kecil
+    dari JSON), fallback ke JSON bytes. String JSON legacy diterima.
+    """
+    if obj is None or isinstance(obj, bytes):
+        return obj
+    if isinstance(obj, str):
+        obj = json.loads(obj)
+    if msgpack is not None:
+        return msgpack.packb(obj, use_bin_type=True)
+    return json.dumps(obj).encode('utf-8')
+
+
+def unpack_blob(raw):
+    """Deserialize bytes dari pack_blob kembali ke dict/list"""
+    if raw is None:
+        return None
+    if msgpack is not None:
+        try:
+            return msgpack.unpackb(raw, raw=False)
+        except Exception:
+            pass  # kemungkinan blob JSON dari fallback/format lama
+    # json.loads menerima str maupun bytes: row lama dari kolom Text
+    # datang sebagai str, bukan bytes
+    return json.loads(raw)
+
+
+class SlugIntEnum(enum.IntEnum):
+    """
+    IntEnum dengan slug string untuk wire format dan tampilan
+
+    Di database disimpan sebagai integer kecil (compare dan storage
+    lebih murah dari string), di protokol jaringan tetap slug string.
+    """
+
+    def __new__(cls, value, slug):
+        obj = int.__new__(cls, value)
+        obj._value_ = value
+        obj.slug = slug
+        return obj
+
+    @classmethod
+    def from_slug(cls, slug: str) -> 'SlugIntEnum':
+        """Ambil member berdasarkan slug wire-format"""
+        lookup = cls.__dict__.get('_slug_lookup')
+        if lookup is None:
+            lookup = {m.slug: m for m in cls}
+            cls._slug_lookup = lookup
+        return lookup[slug]
+
+    @classmethod
+    def describe(cls, value) -> str:
+        """
+        Slug untuk tampilan dari nilai mentah kolom DB
+
+        Database lama menyimpan nama enum SQLAlchemy ('FACE_ABSENCE',
+        'PENDING') di kolom ini; terima bentuk itu (dan slug yang sudah
+        benar) supaya row carried-over tetap bisa ditampilkan.
+        """
+        if isinstance(value, str):
+            member = cls.__members__.get(value)
+            if member is not None:
+                return member.slug
+            return value
+        return cls(value).slug
+
+
+class ViolationType(SlugIntEnum):
     """Jenis pelanggaran yang dapat dideteksi"""
-    APPLICATION_BLOCKED = "application_blocked"
-    PROCESS_TERMINATION_ATTEMPT = "process_termination_attempt"
-    FACE_ABSENCE = "face_absence"
-    MULTIPLE_FACES = "multiple_faces"
-    SUSPICIOUS_MOVEMENT = "suspicious_movement"
-    VOICE_ACTIVITY = "voice_activity"
-    MULTIPLE_SPEAKERS = "multiple_speakers"
-    SCREEN_SWITCH = "screen_switch"
-    SHORTCUT_BLOCKED = "shortcut_blocked"
-    UNAUTHORIZED_WEBSITE = "unauthorized_website"
-
-
-class ViolationSeverity(enum.Enum):
+    APPLICATION_BLOCKED = (1, "application_blocked")
+    PROCESS_TERMINATION_ATTEMPT = (2, "process_termination_attempt")
+    FACE_ABSENCE = (3, "face_absence")
+    MULTIPLE_FACES = (4, "multiple_faces")
+    SUSPICIOUS_MOVEMENT = (5, "suspicious_movement")
+    VOICE_ACTIVITY = (6, "voice_activity")
+    MULTIPLE_SPEAKERS = (7, "multiple_speakers")
+    SCREEN_SWITCH = (8, "screen_switch")
+    SHORTCUT_BLOCKED = (9, "shortcut_blocked")
+    UNAUTHORIZED_WEBSITE = (10, "unauthorized_website")
+
+
+class ViolationSeverity(SlugIntEnum):
     """Tingkat keparahan pelanggaran"""
-    LOW = "low"
-    MEDIUM = "medium"
-    HIGH = "high"
-    CRITICAL = "critical"
+    LOW = (1, "low")
+    MEDIUM = (2, "medium")
+    HIGH = (3, "high")
+    CRITICAL = (4, "critical")
 
 
-class PermissionStatus(enum.Enum):
+class PermissionStatus(SlugIntEnum):
     """Status permintaan izin"""
-    PENDING = "pending"
-    APPROVED = "approved"
-    REJECTED = "rejected"
-    EXPIRED = "expired"
+    PENDING = (1, "pending")
+    APPROVED = (2, "approved")
+    REJECTED = (3, "rejected")
+    EXPIRED = (4, "expired")
+
+
+class ExamSessionStatus(enum.Enum):
+    """Status sesi ujian"""
+    ACTIVE = "active"
+    PAUSED = "paused"
+    COMPLETED = "completed"
 
 
 class ExamSession(Base):
     """Sesi ujian"""
     __tablename__ = 'exam_sessions'
-    
+
     id = Column(Integer, primary_key=True)
     name = Column(String(200), nullable=False)
-    start_time = Column(DateTime, default=datetime.utcnow)
+    start_time = Column(DateTime, server_default=func.current_timestamp())
     end_time = Column(DateTime, nullable=True)
-    status = Column(String(20), default='active')  # active, paused, completed
-    config = Column(Text)  # JSON config untuk sesi ini
-    
+    # values_callable: simpan value ('active') bukan name ('ACTIVE'),
+    # kompatibel dengan data lama dari kolom String
+    status = Column(
+        Enum(ExamSessionStatus, native_enum=False, length=20,
+             values_callable=lambda x: [e.value for e in x]),
+        default=ExamSessionStatus.ACTIVE
+    )
+    config = Column(LargeBinary)  # msgpack config untuk sesi ini
+
     participants = relationship("Participant", back_populates="exam_session")
     violations = relationship("Violation", back_populates="exam_session")
+
+    @property
+    def config_json(self):
+        """Config sebagai dict (decode dari blob msgpack/JSON)"""
+        return unpack_blob(self.config)
     
     def __repr__(self):
         return f"<ExamSession(id={self.id}, name='{self.name}', status='{self.status}')>"
@@ -68,8 +163,8 @@ class Participant(Base):
     exam_session_id = Column(Integer, ForeignKey('exam_sessions.id'), nullable=False)
     computer_ip = Column(String(50))
     computer_name = Column(String(200))
-    joined_at = Column(DateTime, default=datetime.utcnow)
-    last_heartbeat = Column(DateTime, default=datetime.utcnow)
+    joined_at = Column(DateTime, server_default=func.current_timestamp())
+    last_heartbeat = Column(DateTime, server_default=func.current_timestamp())
     is_active = Column(Boolean, default=True)
     integrity_score = Column(Float, default=100.0)
     warning_count = Column(Integer, default=0)
@@ -91,10 +186,10 @@ class Violation(Base):
     id = Column(Integer, primary_key=True)
     participant_id = Column(Integer, ForeignKey('participants.id'), nullable=False)
     exam_session_id = Column(Integer, ForeignKey('exam_sessions.id'), nullable=False)
-    violation_type = Column(Enum(ViolationType), nullable=False)
-    severity = Column(Enum(ViolationSeverity), default=ViolationSeverity.MEDIUM)
+    violation_type = Column(SmallInteger, nullable=False)  # ViolationType
+    severity = Column(SmallInteger, default=ViolationSeverity.MEDIUM)  # ViolationSeverity
     description = Column(Text)
-    timestamp = Column(DateTime, default=datetime.utcnow)
+    timestamp = Column(DateTime, server_default=func.current_timestamp())
     is_resolved = Column(Boolean, default=False)
     resolved_at = Column(DateTime, nullable=True)
     resolved_by = Column(String(100), nullable=True)
@@ -104,7 +199,7 @@ class Violation(Base):
     evidence = relationship("Evidence", back_populates="violation")
     
     def __repr__(self):
-        return f"<Violation(id={self.id}, type='{self.violation_type.value}', participant_id={self.participant_id})>"
+        return f"<Violation(id={self.id}, type='{ViolationType.describe(self.violation_type)}', participant_id={self.participant_id})>"
 
 
 class Evidence(Base):
@@ -116,10 +211,15 @@ class Evidence(Base):
     evidence_type = Column(String(20))  # screenshot, video, audio
     file_path = Column(String(500), nullable=False)
     file_size = Column(Integer)  # bytes
-    created_at = Column(DateTime, default=datetime.utcnow)
-    evidence_metadata = Column(Text)  # JSON metadata (renamed from 'metadata' to avoid SQLAlchemy reserved word)
-    
+    created_at = Column(DateTime, server_default=func.current_timestamp())
+    evidence_metadata = Column(LargeBinary)  # msgpack metadata (renamed from 'metadata' to avoid SQLAlchemy reserved word)
+
     violation = relationship("Violation", back_populates="evidence")
+
+    @property
+    def metadata_json(self):
+        """Metadata sebagai dict (decode dari blob msgpack/JSON)"""
+        return unpack_blob(self.evidence_metadata)
     
     def __repr__(self):
         return f"<Evidence(id={self.id}, type='{self.evidence_type}', violation_id={self.violation_id})>"
@@ -132,8 +232,8 @@ class PermissionRequest(Base):
     id = Column(Integer, primary_key=True)
     participant_id = Column(Integer, ForeignKey('participants.id'), nullable=False)
     request_type = Column(String(50), default='leave_seat')  # leave_seat, toilet, etc
-    status = Column(Enum(PermissionStatus), default=PermissionStatus.PENDING)
-    requested_at = Column(DateTime, default=datetime.utcnow)
+    status = Column(SmallInteger, default=PermissionStatus.PENDING)  # PermissionStatus
+    requested_at = Column(DateTime, server_default=func.current_timestamp())
     approved_at = Column(DateTime, nullable=True)
     expires_at = Column(DateTime, nullable=True)
     duration_minutes = Column(Integer, default=10)
@@ -142,4 +242,4 @@ class PermissionRequest(Base):
     participant = relationship("Participant", back_populates="permission_requests")
     
     def __repr__(self):
-        return f"<PermissionRequest(id={self.id}, participant_id={self.participant_id}, status='{self.status.value}')>"
+        return f"<PermissionRequest(id={self.id}, participant_id={self.participant_id}, status='{PermissionStatus.describe(self.status)}')>"
@@ -2,12 +2,30 @@
 Client untuk Participant application (WebSocket client)
 """
 import asyncio
+import sys
 import websockets
 from typing import Optional, Callable, Dict
 from datetime import datetime
 import json
 from .protocol import Message, MessageType
 
+# uvloop (Linux/macOS) menaikkan throughput asyncio 2-4x tanpa
+# perubahan API; di Windows tetap pakai event loop bawaan
+if sys.platform != "win32":
+    try:
+        import uvloop
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    except ImportError:
+        pass
+
+
+# Batas pesan per drain supaya antrian outbound tidak menahan loop
+# terlalu lama dan buffer tidak tumbuh tanpa batas
+_MAX_SEND_BATCH = 32
+
+# Batas frame inbound yang di-drain per wake (jaga fairness event loop)
+_MAX_RECV_BATCH = 64
+
 
 class ProctoringClient:
     """Client untuk participant application"""
@@ -26,9 +44,16 @@ class ProctoringClient:
         self.is_connected = False
         self.reconnect_interval = 5
         self.running = False
+
+        # Antrian outbound + task drain: pesan-pesan kecil yang burst
+        # (heartbeat, status update) dikirim dalam satu wake event loop
+        self._out_q: Optional[asyncio.Queue] = None
+        self._sender_task: Optional[asyncio.Task] = None
+        # Loop tempat client jalan, untuk stop() dari thread lain (UI)
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
         
-        # Message handlers
-        self.message_handlers: Dict[MessageType, Callable] = {}
+        # Message handlers: array di-index nilai MessageType (IntEnum)
+        self._handler_table: list = [None] * len(MessageType)
         self.register_handler(MessageType.REGISTER_ACK, self._handle_register_ack)
         self.register_handler(MessageType.CONFIG_UPDATE, self._handle_config_update)
         self.register_handler(MessageType.WARNING, self._handle_warning)
@@ -39,40 +64,93 @@ class ProctoringClient:
     
     def register_handler(self, msg_type: MessageType, handler: Callable):
         """Register message handler"""
-        self.message_handlers[msg_type] = handler
+        self._handler_table[msg_type] = handler
     
     async def connect(self):
         """Connect to server"""
+        # Batalkan sender lama dulu: siklus reconnect yang gagal terus
+        # akan menumpuk satu task yang parkir di get() antrian lama
+        # setiap percobaan kalau tidak dibersihkan
+        if self._sender_task is not None:
+            self._sender_task.cancel()
+            self._sender_task = None
+
         try:
             uri = f"{self.server_url}/ws/{self.participant_id}"
-            self.websocket = await websockets.connect(uri)
+            self.websocket = await websockets.connect(
+                uri,
+                extensions=self._deflate_extensions(),
+                max_size=None
+            )
             self.is_connected = True
+            self._loop = asyncio.get_running_loop()
+            self._out_q = asyncio.Queue()
+            self._sender_task = asyncio.create_task(self._sender_loop())
             return True
         except Exception as e:
             print(f"Error connecting to server: {e}")
             self.is_connected = False
             return False
     
+    @staticmethod
+    def _deflate_extensions():
+        """
+        Konfigurasi permessage-deflate dengan memLevel rendah
+
+        Payload besar (status + data pelanggaran) tetap terkompres,
+        tapi memori/CPU per koneksi turun dibanding setelan default.
+        """
+        try:
+            from websockets.extensions.permessage_deflate import (
+                ClientPerMessageDeflateFactory
+            )
+            return [ClientPerMessageDeflateFactory(
+                compress_settings={'memLevel': 4}
+            )]
+        except ImportError:
+            return None
+
     async def disconnect(self):
         """Disconnect from server"""
         self.is_connected = False
+        if self._sender_task:
+            self._sender_task.cancel()
+            self._sender_task = None
         if self.websocket:
             await self.websocket.close()
             self.websocket = None
     
     async def send_message(self, message: Message) -> bool:
-        """Send message to server"""
-        if not self.is_connected or not self.websocket:
+        """Queue message untuk dikirim (dikirim oleh sender loop)"""
+        if not self.is_connected or not self.websocket or self._out_q is None:
             return False
-        
+
+        message.participant_id = self.participant_id
+        self._out_q.put_nowait(message)
+        return True
+
+    async def _sender_loop(self):
+        """Drain antrian outbound; satu wake per batch, bukan per pesan"""
         try:
-            message.participant_id = self.participant_id
-            await self.websocket.send(message.to_json())
-            return True
-        except Exception as e:
-            print(f"Error sending message: {e}")
-            self.is_connected = False
-            return False
+            while self.is_connected:
+                batch = [await self._out_q.get()]
+                while len(batch) < _MAX_SEND_BATCH:
+                    try:
+                        batch.append(self._out_q.get_nowait())
+                    except asyncio.QueueEmpty:
+                        break
+
+                try:
+                    for message in batch:
+                        # bytes dikirim websockets sebagai frame binary,
+                        # tanpa decode/encode str di tengah
+                        await self.websocket.send(message.to_bytes())
+                except Exception as e:
+                    print(f"Error sending message: {e}")
+                    self.is_connected = False
+                    break
+        except asyncio.CancelledError:
+            pass
     
     async def register(self, name: str, computer_ip: str = None, computer_name: str = None):
         """Register dengan server"""
@@ -130,7 +208,7 @@ class ProctoringClient:
     
     async def _handle_message(self, message: Message):
         """Handle incoming message"""
-        handler = self.message_handlers.get(message.type)
+        handler = self._handler_table[message.type]
         if handler:
             await handler(message)
         else:
@@ -170,8 +248,19 @@ class ProctoringClient:
             try:
                 if self.websocket:
                     data = await self.websocket.recv()
-                    message = Message.from_json(data)
-                    await self._handle_message(message)
+                    # Drain frame yang sudah antri di buffer websockets:
+                    # burst dari server (config + beberapa warning) diproses
+                    # dalam satu wake, bukan satu round-trip loop per frame
+                    messages = [data]
+                    queued = getattr(self.websocket, 'messages', None)
+                    if queued is not None:
+                        while len(messages) < _MAX_RECV_BATCH:
+                            try:
+                                messages.append(queued.popleft())
+                            except (IndexError, AttributeError):
+                                break
+                    for raw in messages:
+                        await self._handle_message(Message.from_json(raw))
             except websockets.exceptions.ConnectionClosed:
                 print("Connection closed")
                 self.is_connected = False
@@ -199,6 +288,29 @@ class ProctoringClient:
                 await asyncio.sleep(self.reconnect_interval)
     
     def stop(self):
-        """Stop client"""
+        """
+        Stop client (aman dipanggil dari thread manapun)
+
+        create_task langsung meledak kalau dipanggil dari thread UI
+        (tidak ada running loop); run_coroutine_threadsafe menjadwalkan
+        disconnect di loop client dan menunggu selesai.
+        """
         self.running = False
-        asyncio.create_task(self.disconnect())
+        loop = self._loop
+        if loop is None or not loop.is_running():
+            return
+
+        try:
+            current = asyncio.get_running_loop()
+        except RuntimeError:
+            current = None
+
+        if current is loop:
+            # Sudah di dalam loop client: cukup jadwalkan
+            asyncio.create_task(self.disconnect())
+        else:
+            future = asyncio.run_coroutine_threadsafe(self.disconnect(), loop)
+            try:
+                future.result(timeout=5)
+            except Exception as e:
+                print(f"Error stopping client: {e}")
@@ -1,44 +1,91 @@
 """
 Protocol untuk komunikasi antara admin dan participant
 """
-from enum import Enum
+from enum import IntEnum
 from typing import Dict, Any, Optional
 from datetime import datetime
 import json
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
-class MessageType(Enum):
-    """Jenis pesan"""
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+# Versi skema wire-format msgpack (prefix 1 byte) supaya format
+# bisa dievolusi tanpa memutus client lama
+MSGPACK_SCHEMA_VERSION = 1
+
+
+class MessageType(IntEnum):
+    """
+    Jenis pesan
+
+    IntEnum dengan nilai berurutan: di wire dikirim sebagai integer
+    kecil, dan di receive loop dispatch handler cukup index array
+    tanpa hashing enum.
+    """
     # Participant -> Admin
-    REGISTER = "register"
-    HEARTBEAT = "heartbeat"
-    VIOLATION_REPORT = "violation_report"
-    PERMISSION_REQUEST = "permission_request"
-    STATUS_UPDATE = "status_update"
-    
+    REGISTER = 0
+    HEARTBEAT = 1
+    VIOLATION_REPORT = 2
+    PERMISSION_REQUEST = 3
+    STATUS_UPDATE = 4
+
     # Admin -> Participant
-    REGISTER_ACK = "register_ack"
-    CONFIG_UPDATE = "config_update"
-    WARNING = "warning"
-    LOCK = "lock"
-    UNLOCK = "unlock"
-    PERMISSION_RESPONSE = "permission_response"
-    EMERGENCY_LOCK = "emergency_lock"
-    
+    REGISTER_ACK = 5
+    CONFIG_UPDATE = 6
+    WARNING = 7
+    LOCK = 8
+    UNLOCK = 9
+    PERMISSION_RESPONSE = 10
+    EMERGENCY_LOCK = 11
+
     # Bidirectional
-    PING = "ping"
-    PONG = "pong"
+    PING = 12
+    PONG = 13
+
+
+# Lookup value -> member yang dihitung sekali: Enum.__call__ lewat jalur
+# _missing_ jauh lebih mahal dari satu dict lookup di receive loop
+_MSG_TYPE_LOOKUP = {m.value: m for m in MessageType}
 
 
 class Message:
     """Pesan untuk komunikasi"""
-    
+
+    # Tanpa __dict__ per instance: Message dibuat/dibuang ribuan kali
+    # per detik di jalur send/recv, slot memangkas memori per objek dan
+    # mempercepat akses atribut
+    __slots__ = ('type', 'data', '_participant_id', 'timestamp',
+                 '_cached_json', '_cached_bytes')
+
     def __init__(self, msg_type: MessageType, data: Dict[str, Any] = None,
                  participant_id: str = None, timestamp: datetime = None):
         self.type = msg_type
         self.data = data or {}
-        self.participant_id = participant_id
+        self._participant_id = participant_id
         self.timestamp = timestamp or datetime.utcnow()
+        # Hasil serialize di-memo supaya broadcast ke N client cukup
+        # satu kali encode, bukan N kali
+        self._cached_json: Optional[str] = None
+        self._cached_bytes: Optional[bytes] = None
+
+    @property
+    def participant_id(self) -> Optional[str]:
+        return self._participant_id
+
+    @participant_id.setter
+    def participant_id(self, value: Optional[str]):
+        # Mutasi participant_id membatalkan cache serialize
+        if value != self._participant_id:
+            self._participant_id = value
+            self._cached_json = None
+            self._cached_bytes = None
     
     def to_dict(self) -> Dict[str, Any]:
         """Convert message to dictionary"""
@@ -53,20 +100,65 @@ class Message:
     def from_dict(cls, data: Dict[str, Any]) -> 'Message':
         """Create message from dictionary"""
         return cls(
-            msg_type=MessageType(data['type']),
+            msg_type=_MSG_TYPE_LOOKUP[data['type']],
             data=data.get('data', {}),
             participant_id=data.get('participant_id'),
             timestamp=datetime.fromisoformat(data.get('timestamp', datetime.utcnow().isoformat()))
         )
     
     def to_json(self) -> str:
-        """Convert message to JSON string"""
-        return json.dumps(self.to_dict())
-    
+        """Convert message to JSON string (hasil di-cache per instance)"""
+        if self._cached_json is None:
+            # orjson (C-accelerated) encode 3-10x lebih cepat dari json
+            # stdlib; ini jalur panas untuk setiap frame WebSocket
+            if orjson is not None:
+                self._cached_json = orjson.dumps(self.to_dict()).decode()
+            else:
+                self._cached_json = json.dumps(self.to_dict())
+        return self._cached_json
+
+    def to_bytes(self) -> bytes:
+        """
+        Serialize ke bytes UTF-8 untuk frame binary WebSocket
+
+        Menghindari round-trip bytes -> str -> bytes yang dipaksa
+        send_text; hasilnya di-cache seperti to_json.
+        """
+        if self._cached_bytes is None:
+            if orjson is not None:
+                self._cached_bytes = orjson.dumps(self.to_dict())
+            else:
+                self._cached_bytes = json.dumps(self.to_dict()).encode('utf-8')
+        return self._cached_bytes
+
     @classmethod
-    def from_json(cls, json_str: str) -> 'Message':
-        """Create message from JSON string"""
+    def from_json(cls, json_str) -> 'Message':
+        """Create message from JSON string atau bytes"""
+        if orjson is not None:
+            return cls.from_dict(orjson.loads(json_str))
         return cls.from_dict(json.loads(json_str))
+
+    def to_msgpack(self) -> bytes:
+        """
+        Convert message ke bytes msgpack (binary, lebih kompak dari JSON)
+
+        Byte pertama adalah versi skema. Butuh library msgpack.
+        """
+        if msgpack is None:
+            raise RuntimeError("msgpack tidak terinstall")
+        return bytes([MSGPACK_SCHEMA_VERSION]) + msgpack.packb(
+            self.to_dict(), use_bin_type=True
+        )
+
+    @classmethod
+    def from_msgpack(cls, payload: bytes) -> 'Message':
+        """Create message dari bytes msgpack"""
+        if msgpack is None:
+            raise RuntimeError("msgpack tidak terinstall")
+        version = payload[0]
+        if version != MSGPACK_SCHEMA_VERSION:
+            raise ValueError(f"Versi skema msgpack tidak dikenal: {version}")
+        return cls.from_dict(msgpack.unpackb(payload[1:], raw=False))
     
     def __repr__(self):
         return f"<Message(type={self.type.value}, participant_id={self.participant_id})>"
@@ -9,6 +9,30 @@ import asyncio
 from datetime import datetime
 from .protocol import Message, MessageType
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+_HEARTBEAT = MessageType.HEARTBEAT.value
+
+
+def _install_uvloop() -> bool:
+    """
+    Pasang uvloop kalau tersedia (2-4x throughput asyncio)
+
+    uvloop tidak tersedia di Windows; fallback ke selector loop bawaan.
+    """
+    import sys
+    if sys.platform == "win32":
+        return False
+    try:
+        import uvloop
+        uvloop.install()
+        return True
+    except ImportError:
+        return False
+
 
 class ProctoringServer:
     """Server untuk admin application"""
@@ -26,6 +50,23 @@ class ProctoringServer:
         self.app = FastAPI()
         self.connected_clients: Dict[str, WebSocket] = {}  # participant_id -> websocket
         self.client_info: Dict[str, Dict] = {}  # participant_id -> info
+
+        # Timestamp ISO per-detik yang di-update background task:
+        # heartbeat tidak butuh presisi mikrodetik, jadi N client per
+        # interval cukup satu alokasi datetime+isoformat, bukan N
+        self._now_iso: str = None
+        self._clock_task = None
+
+        # Batasi handler yang jalan paralel: handler lambat (tulis DB di
+        # violation report) tidak boleh memblokir baca frame berikutnya,
+        # tapi juga tidak boleh menumpuk task tanpa batas
+        self._handler_sem = asyncio.Semaphore(64)
+        self._max_pending_per_client = 32
+
+        # Statement validasi participant (dibangun lazy, butuh sqlalchemy)
+        # + cache row per (participant_id, session) untuk validasi ulang
+        self._validate_stmt = None
+        self._validate_cache: Dict[tuple, tuple] = {}
         
         # Setup CORS
         self.app.add_middleware(
@@ -39,8 +80,9 @@ class ProctoringServer:
         # Setup routes
         self._setup_routes()
         
-        # Message handlers
-        self.message_handlers: Dict[MessageType, callable] = {}
+        # Message handlers: array di-index nilai MessageType (IntEnum),
+        # lebih murah dari dict lookup dengan key enum di receive loop
+        self._handler_table: List[callable] = [None] * len(MessageType)
         self.register_handler(MessageType.REGISTER, self._handle_register)
         self.register_handler(MessageType.HEARTBEAT, self._handle_heartbeat)
         self.register_handler(MessageType.VIOLATION_REPORT, self._handle_violation_report)
@@ -49,7 +91,17 @@ class ProctoringServer:
     
     def _setup_routes(self):
         """Setup FastAPI routes"""
-        
+
+        @self.app.on_event("startup")
+        async def start_clock():
+            self._clock_task = asyncio.create_task(self._clock_loop())
+
+        @self.app.on_event("shutdown")
+        async def stop_clock():
+            if self._clock_task:
+                self._clock_task.cancel()
+                self._clock_task = None
+
         @self.app.get("/")
         async def root():
             return {"status": "Proctoring Server", "connected_clients": len(self.connected_clients)}
@@ -72,64 +124,135 @@ class ProctoringServer:
             """Validate participant ID and name"""
             # This will be handled by admin app via callback
             if hasattr(self, 'admin_app') and self.admin_app:
-                # Ambil data participant saat masih dalam session
-                with self.admin_app.db_manager.get_session() as session:
-                    from shared.database.models import Participant
-                    participant = session.query(Participant).filter_by(participant_id=participant_id).first()
-                    if participant:
-                        participant_name = participant.name
-                        participant_session_id = participant.exam_session_id
-                        
-                        # Validasi sesi ujian aktif DULU (jangan sampai error message-nya membingungkan)
-                        if not self.admin_app.current_session_id:
-                            return {"valid": False, "message": "❌ Sesi ujian belum dimulai oleh pengawas. Minta pengawas untuk mulai sesi."}
-                        
-                        if participant_session_id != self.admin_app.current_session_id:
-                            return {"valid": False, "message": "❌ ID Peserta tidak terdaftar untuk sesi ujian ini."}
-                        
-                        # Validasi nama (normalisasi spasi & huruf)
-                        if name and participant_name.strip().lower() != name.strip().lower():
-                            return {"valid": False, "message": f"❌ Nama tidak sesuai. Nama yang terdaftar: '{participant_name}' tapi Anda input: '{name}'"}
-                        
-                        return {"valid": True, "participant": {"id": participant_id, "name": participant_name}}
-                    return {"valid": False, "message": f"❌ ID Peserta '{participant_id}' tidak terdaftar di database"}
+                if self._validate_stmt is None:
+                    from sqlalchemy import text
+                    # Hanya dua kolom yang dibaca: SELECT text() langsung,
+                    # tanpa hidrasi entity ORM di jalur handshake
+                    self._validate_stmt = text(
+                        "SELECT name, exam_session_id FROM participants "
+                        "WHERE participant_id = :pid LIMIT 1"
+                    )
+
+                cache_key = (participant_id, self.admin_app.current_session_id)
+                row = self._validate_cache.get(cache_key)
+                if row is None:
+                    with self.admin_app.db_manager.get_session() as session:
+                        row = session.execute(
+                            self._validate_stmt, {"pid": participant_id}
+                        ).first()
+                    if row is not None:
+                        # Hanya cache row yang ketemu: participant bisa
+                        # ditambahkan admin di tengah sesi
+                        self._validate_cache[cache_key] = tuple(row)
+                if row is not None:
+                    participant_name, participant_session_id = row[0], row[1]
+
+                    # Validasi sesi ujian aktif DULU (jangan sampai error message-nya membingungkan)
+                    if not self.admin_app.current_session_id:
+                        return {"valid": False, "message": "❌ Sesi ujian belum dimulai oleh pengawas. Minta pengawas untuk mulai sesi."}
+
+                    if participant_session_id != self.admin_app.current_session_id:
+                        return {"valid": False, "message": "❌ ID Peserta tidak terdaftar untuk sesi ujian ini."}
+
+                    # Validasi nama (normalisasi spasi & huruf)
+                    if name and participant_name.strip().lower() != name.strip().lower():
+                        return {"valid": False, "message": f"❌ Nama tidak sesuai. Nama yang terdaftar: '{participant_name}' tapi Anda input: '{name}'"}
+
+                    return {"valid": True, "participant": {"id": participant_id, "name": participant_name}}
+                return {"valid": False, "message": f"❌ ID Peserta '{participant_id}' tidak terdaftar di database"}
             return {"valid": False, "message": "❌ Server belum siap. Hubungi pengawas."}
         
         @self.app.websocket("/ws/{participant_id}")
         async def websocket_endpoint(websocket: WebSocket, participant_id: str):
             await websocket.accept()
             self.connected_clients[participant_id] = websocket
-            
+            pending: Set[asyncio.Task] = set()
+
             try:
                 while True:
-                    data = await websocket.receive_text()
-                    message = Message.from_json(data)
-                    await self._handle_message(participant_id, message)
+                    # Terima frame text maupun binary; client baru mengirim
+                    # binary (orjson bytes), client lama masih text
+                    raw = await websocket.receive()
+                    if raw["type"] == "websocket.disconnect":
+                        self._disconnect_client(participant_id)
+                        break
+                    data = raw.get("bytes")
+                    if data is None:
+                        data = raw.get("text")
+                    if data is None:
+                        continue
+                    parsed = (orjson.loads(data) if orjson is not None
+                              else json.loads(data))
+                    # Fast path heartbeat: tipe pesan paling sering dan
+                    # handlernya cuma update dict, tidak perlu bayar
+                    # konstruksi Message + parse timestamp. Hanya berlaku
+                    # selama handler default belum di-override admin app
+                    if (parsed.get('type') == _HEARTBEAT
+                            and self._handler_table[_HEARTBEAT]
+                            == self._handle_heartbeat):
+                        info = self.client_info.get(participant_id)
+                        if info is not None:
+                            info['last_heartbeat'] = self._iso_now()
+                            info['connected'] = True
+                        continue
+                    message = Message.from_dict(parsed)
+                    # Jalankan handler sebagai task supaya handler lambat
+                    # tidak menahan baca frame; cap per koneksi mencegah
+                    # penumpukan kalau handler tertinggal dari inbound
+                    if len(pending) >= self._max_pending_per_client:
+                        await self._handle_message(participant_id, message)
+                    else:
+                        task = asyncio.create_task(
+                            self._run_handler(participant_id, message)
+                        )
+                        pending.add(task)
+                        task.add_done_callback(pending.discard)
             except WebSocketDisconnect:
                 self._disconnect_client(participant_id)
             except Exception as e:
                 print(f"Error in websocket: {e}")
                 self._disconnect_client(participant_id)
     
+    async def _clock_loop(self):
+        """Update cache timestamp ISO sekali per detik"""
+        try:
+            while True:
+                self._now_iso = datetime.utcnow().isoformat()
+                await asyncio.sleep(1)
+        except asyncio.CancelledError:
+            pass
+
+    def _iso_now(self) -> str:
+        """Timestamp ISO ter-cache (granularitas detik), fallback hitung"""
+        return self._now_iso or datetime.utcnow().isoformat()
+
     def _disconnect_client(self, participant_id: str):
         """Handle client disconnect"""
         if participant_id in self.connected_clients:
             del self.connected_clients[participant_id]
         if participant_id in self.client_info:
-            self.client_info[participant_id]['last_seen'] = datetime.utcnow().isoformat()
+            self.client_info[participant_id]['last_seen'] = self._iso_now()
             self.client_info[participant_id]['connected'] = False
     
+    async def _run_handler(self, participant_id: str, message: Message):
+        """Jalankan handler di bawah semaphore global"""
+        try:
+            async with self._handler_sem:
+                await self._handle_message(participant_id, message)
+        except Exception as e:
+            print(f"Error in handler for {participant_id}: {e}")
+
     async def _handle_message(self, participant_id: str, message: Message):
         """Handle incoming message"""
-        handler = self.message_handlers.get(message.type)
+        handler = self._handler_table[message.type]
         if handler:
             await handler(participant_id, message)
         else:
             print(f"No handler for message type: {message.type}")
-    
+
     def register_handler(self, msg_type: MessageType, handler: callable):
         """Register message handler"""
-        self.message_handlers[msg_type] = handler
+        self._handler_table[msg_type] = handler
     
     async def _handle_register(self, participant_id: str, message: Message):
         """Handle participant registration"""
@@ -140,7 +263,7 @@ class ProctoringServer:
             'name': data.get('name', ''),
             'computer_ip': data.get('computer_ip', ''),
             'computer_name': data.get('computer_name', ''),
-            'registered_at': datetime.utcnow().isoformat(),
+            'registered_at': self._iso_now(),
             'connected': True
         }
         
@@ -155,7 +278,7 @@ class ProctoringServer:
     async def _handle_heartbeat(self, participant_id: str, message: Message):
         """Handle heartbeat"""
         if participant_id in self.client_info:
-            self.client_info[participant_id]['last_heartbeat'] = datetime.utcnow().isoformat()
+            self.client_info[participant_id]['last_heartbeat'] = self._iso_now()
             self.client_info[participant_id]['connected'] = True
     
     async def _handle_violation_report(self, participant_id: str, message: Message):
@@ -173,12 +296,18 @@ class ProctoringServer:
         if participant_id in self.client_info:
             self.client_info[participant_id].update(message.data)
     
-    async def send_message(self, participant_id: str, message: Message) -> bool:
-        """Send message to participant"""
+    async def send_message(self, participant_id: str, message) -> bool:
+        """Send message to participant (Message atau payload pre-serialized)"""
         if participant_id in self.connected_clients:
             try:
                 websocket = self.connected_clients[participant_id]
-                await websocket.send_text(message.to_json())
+                if isinstance(message, bytes):
+                    await websocket.send_bytes(message)
+                elif isinstance(message, str):
+                    await websocket.send_text(message)
+                else:
+                    # send_bytes: tanpa transcode bytes->str->bytes internal
+                    await websocket.send_bytes(message.to_bytes())
                 return True
             except Exception as e:
                 print(f"Error sending message to {participant_id}: {e}")
@@ -189,9 +318,25 @@ class ProctoringServer:
     async def broadcast_message(self, message: Message, exclude: List[str] = None):
         """Broadcast message to all participants"""
         exclude = exclude or []
-        for participant_id in list(self.connected_clients.keys()):
-            if participant_id not in exclude:
-                await self.send_message(participant_id, message)
+        # Serialize sekali untuk semua penerima, lalu fan-out paralel:
+        # semua send masuk buffer per-koneksi dalam satu putaran event loop
+        payload = message.to_bytes()
+        targets = [
+            (participant_id, websocket)
+            for participant_id, websocket in list(self.connected_clients.items())
+            if participant_id not in exclude
+        ]
+        if not targets:
+            return
+
+        results = await asyncio.gather(
+            *(websocket.send_bytes(payload) for _, websocket in targets),
+            return_exceptions=True
+        )
+        for (participant_id, _), result in zip(targets, results):
+            if isinstance(result, Exception):
+                print(f"Error sending message to {participant_id}: {result}")
+                self._disconnect_client(participant_id)
     
     def get_connected_participants(self) -> List[str]:
         """Get list of connected participant IDs"""
@@ -204,11 +349,22 @@ class ProctoringServer:
     def run(self):
         """Run server (blocking)"""
         import uvicorn
-        uvicorn.run(self.app, host=self.host, port=self.port)
-    
+        # permessage-deflate eksplisit: payload besar (report pelanggaran
+        # dengan data terstruktur) sering bandwidth-bound di LAN ujian
+        if _install_uvloop():
+            uvicorn.run(self.app, host=self.host, port=self.port,
+                        loop="uvloop", ws_per_message_deflate=True)
+        else:
+            uvicorn.run(self.app, host=self.host, port=self.port,
+                        ws_per_message_deflate=True)
+
     async def start(self):
         """Start server (async)"""
         import uvicorn
-        config = uvicorn.Config(self.app, host=self.host, port=self.port)
+        config = uvicorn.Config(
+            self.app, host=self.host, port=self.port,
+            loop="uvloop" if _install_uvloop() else "auto",
+            ws_per_message_deflate=True
+        )
         server = uvicorn.Server(config)
         await server.serve()
@@ -1,23 +1,34 @@
 """
 Utility untuk load konfigurasi
 """
+import copy
 import json
 import os
 from typing import Dict, Any
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Cache hasil parse per path: {path: (mtime_ns, parsed)}.
+# Config jarang berubah, jadi load berulang cukup satu os.stat,
+# bukan json.loads penuh
+_CACHE: Dict[str, tuple] = {}
+
 
 class ConfigLoader:
     """Loader untuk file konfigurasi"""
-    
+
     @staticmethod
     def load_config(config_path: str, template_path: str = None) -> Dict[str, Any]:
         """
         Load konfigurasi dari file
-        
+
         Args:
             config_path: Path ke file config
             template_path: Path ke template (optional)
-        
+
         Returns:
             Dict konfigurasi
         """
@@ -28,19 +39,44 @@ class ConfigLoader:
                 import shutil
                 os.makedirs(os.path.dirname(config_path), exist_ok=True)
                 shutil.copy(template_path, config_path)
-        
+
         if os.path.exists(config_path):
-            with open(config_path, 'r', encoding='utf-8') as f:
-                return json.load(f)
+            return ConfigLoader._load_cached(config_path)
         elif template_path and os.path.exists(template_path):
-            with open(template_path, 'r', encoding='utf-8') as f:
-                return json.load(f)
+            return ConfigLoader._load_cached(template_path)
         else:
             return {}
-    
+
+    @staticmethod
+    def _load_cached(path: str) -> Dict[str, Any]:
+        """
+        Baca + parse file dengan cache berbasis mtime
+
+        Caller selalu menerima deep copy: admin app memutasi config
+        hasil load sebelum save, dan mutasi itu tidak boleh bocor ke
+        entry cache (mtime belum berubah, hit berikutnya akan
+        mengembalikan data yang sudah menyimpang dari file).
+        """
+        st = os.stat(path)
+        entry = _CACHE.get(path)
+        if entry is not None and entry[0] == st.st_mtime_ns:
+            return copy.deepcopy(entry[1])
+
+        with open(path, 'rb') as f:
+            raw = f.read()
+        parsed = orjson.loads(raw) if orjson is not None else json.loads(raw)
+        _CACHE[path] = (st.st_mtime_ns, parsed)
+        return copy.deepcopy(parsed)
+
+    @staticmethod
+    def invalidate(config_path: str):
+        """Buang entry cache untuk path (paksa re-parse di load berikutnya)"""
+        _CACHE.pop(config_path, None)
+
     @staticmethod
     def save_config(config_path: str, config: Dict[str, Any]):
         """Save konfigurasi ke file"""
         os.makedirs(os.path.dirname(config_path), exist_ok=True)
         with open(config_path, 'w', encoding='utf-8') as f:
             json.dump(config, f, indent=2, ensure_ascii=False)
+        ConfigLoader.invalidate(config_path)
@@ -8,7 +8,17 @@ from datetime import datetime
 from pathlib import Path
 from typing import Optional, Dict
 import threading
-from collections import deque
+import asyncio
+from concurrent.futures import ThreadPoolExecutor, Future
+
+# Urutan probe codec H.264: encoder hardware dulu (GPU/ASIC, 5-20x
+# throughput mp4v software dengan bitrate lebih rendah), lalu libx264
+_H264_CODECS = ('h264_nvenc', 'h264_videotoolbox', 'h264_vaapi', 'libx264')
+
+# Jumlah slot buffer frame yang dipakai ulang per recording: grab layar
+# menulis ke slot yang sudah dialokasi, bukan ndarray baru per frame
+# (1080p BGR = ~6 MB per frame, 10 fps = 60 MB/s churn allocator)
+_N_RING_SLOTS = 4
 
 
 class EvidenceCapture:
@@ -23,10 +33,36 @@ class EvidenceCapture:
         """
         self.evidence_dir = evidence_dir
         Path(evidence_dir).mkdir(parents=True, exist_ok=True)
-        
-        # Video recording
-        self.video_writers: Dict[str, cv2.VideoWriter] = {}
-        self.video_frames: Dict[str, deque] = {}
+
+        # Format screenshot: webp encode 3-8x lebih cepat dan filenya
+        # 5-10x lebih kecil dari PNG; 'png' masih didukung sebagai opsi
+        self.image_format = 'webp'
+
+        # Screen grabber mss (lazy, optional): bicara langsung ke
+        # compositor native, 3-8x lebih cepat per frame dari pyautogui/PIL
+        # dan instance-nya bisa dipakai ulang antar capture
+        self._sct = None
+        self._sct_checked = False
+        self._sct_lock = threading.Lock()
+
+        # Video recording; tiap writer berupa tuple
+        # ('av', container, stream) atau ('cv2', VideoWriter, None)
+        self.video_writers: Dict[str, tuple] = {}
+        # Jumlah frame per recording (counter int, bukan deque timestamp:
+        # datetime.utcnow() per frame adalah alokasi objek yang sia-sia)
+        self.video_frames: Dict[str, int] = {}
+        self.video_paths: Dict[str, str] = {}
+        # Thread perekam + event stop per recording
+        self._record_threads: Dict[str, threading.Thread] = {}
+        self._record_stops: Dict[str, threading.Event] = {}
+
+        # Pool untuk I/O screenshot: caller (loop asyncio / thread UI)
+        # tidak boleh ikut menunggu grab + encode + tulis disk. Penulisan
+        # video TIDAK lewat pool ini: tiap recording punya satu thread
+        # sendiri karena writer cv2/av tidak thread-safe
+        self._io_pool = ThreadPoolExecutor(
+            max_workers=2, thread_name_prefix='evidence'
+        )
         self.video_duration = 10.0  # seconds
         self.video_fps = 10
     
@@ -41,19 +77,67 @@ class EvidenceCapture:
             Path ke screenshot file
         """
         try:
-            import pyautogui
-            screenshot = pyautogui.screenshot()
-            
             if filename is None:
                 timestamp = datetime.utcnow().strftime("%Y%m%d_%H%M%S")
-                filename = f"screenshot_{timestamp}.png"
-            
+                filename = f"screenshot_{timestamp}.{self.image_format}"
+
             filepath = os.path.join(self.evidence_dir, filename)
-            screenshot.save(filepath)
+
+            grabber = self._get_screen_grabber()
+            if grabber is not None:
+                # Instance mss dishare antar thread pool -> grab di
+                # bawah lock; encode/tulis file di luar lock
+                with self._sct_lock:
+                    img = grabber.grab(grabber.monitors[0])
+                    rgb, size = img.rgb, img.size
+                if filepath.endswith('.png'):
+                    import mss.tools
+                    mss.tools.to_png(rgb, size, output=filepath)
+                else:
+                    from PIL import Image
+                    pil_img = Image.frombytes('RGB', size, rgb)
+                    # method=0 = encoder webp tercepat
+                    pil_img.save(filepath, 'WEBP', quality=85, method=0)
+            else:
+                import pyautogui
+                screenshot = pyautogui.screenshot()
+                if filepath.endswith('.png'):
+                    screenshot.save(filepath)
+                else:
+                    screenshot.save(filepath, 'WEBP', quality=85, method=0)
             return filepath
         except Exception as e:
             print(f"Error capturing screenshot: {e}")
             return None
+
+    async def acapture_screenshot(self, filename: str = None) -> Optional[str]:
+        """Versi async capture_screenshot (jalan di pool, loop tetap hidup)"""
+        return await asyncio.get_running_loop().run_in_executor(
+            self._io_pool, self.capture_screenshot, filename
+        )
+
+    def submit_violation_evidence(self, violation_id: str,
+                                  violation_type: str) -> Future:
+        """
+        Jadwalkan capture_violation_evidence di pool I/O
+
+        Untuk caller sinkron (callback Qt/deteksi) yang tidak boleh
+        memblokir selama grab + encode screenshot.
+        """
+        return self._io_pool.submit(
+            self.capture_violation_evidence, violation_id, violation_type
+        )
+
+    def _get_screen_grabber(self):
+        """Ambil instance mss yang dipakai ulang (None jika tidak tersedia)"""
+        if not self._sct_checked:
+            self._sct_checked = True
+            try:
+                import mss
+                self._sct = mss.mss()
+            except Exception:
+                self._sct = None
+        return self._sct
     
     def start_video_recording(self, violation_id: str, duration: float = 10.0):
         """
@@ -67,51 +151,168 @@ class EvidenceCapture:
         timestamp = datetime.utcnow().strftime("%Y%m%d_%H%M%S")
         filename = f"video_{violation_id}_{timestamp}.mp4"
         filepath = os.path.join(self.evidence_dir, filename)
-        
+
         # Get screen size
         import pyautogui
         screen_size = pyautogui.size()
         width, height = screen_size
-        
+
+        self.video_writers[violation_id] = self._open_video_writer(
+            filepath, width, height
+        )
+        self.video_paths[violation_id] = filepath
+        self.video_frames[violation_id] = 0
+
+        # Thread perekam: grab layar ke pool buffer tetap lalu encode.
+        # Hanya jalan kalau mss tersedia (grab per-frame via pyautogui
+        # terlalu lambat untuk 10 fps)
+        if self._get_screen_grabber() is not None:
+            stop_event = threading.Event()
+            thread = threading.Thread(
+                target=self._record_loop,
+                args=(violation_id, duration, width, height, stop_event),
+                daemon=True
+            )
+            self._record_stops[violation_id] = stop_event
+            self._record_threads[violation_id] = thread
+            thread.start()
+
+    def _record_loop(self, violation_id: str, duration: float,
+                     width: int, height: int, stop_event: threading.Event):
+        """
+        Loop perekam layar dengan ring buffer frame
+
+        Slot ndarray dialokasi sekali lalu diisi ulang bergiliran;
+        np.copyto menulis ke memori yang sama sehingga tidak ada
+        alokasi ~6 MB per frame selama recording.
+        """
+        import time
+        try:
+            import mss
+            # Instance mss per thread (handle X11/GDI tidak thread-safe)
+            sct = mss.mss()
+        except Exception:
+            return
+
+        ring = [np.empty((height, width, 3), dtype=np.uint8)
+                for _ in range(_N_RING_SLOTS)]
+        monitor = sct.monitors[0]
+        frame_interval = 1.0 / self.video_fps
+        deadline = time.monotonic() + duration
+        slot = 0
+
+        try:
+            while not stop_event.is_set() and time.monotonic() < deadline:
+                start = time.monotonic()
+                img = sct.grab(monitor)
+                raw = np.frombuffer(img.bgra, dtype=np.uint8)
+                raw = raw.reshape((img.height, img.width, 4))
+                buf = ring[slot]
+                # Buang channel alpha sambil copy ke slot pool
+                np.copyto(buf, raw[:height, :width, :3])
+                self.add_video_frame(violation_id, buf)
+                slot = (slot + 1) % _N_RING_SLOTS
+
+                sleep_for = frame_interval - (time.monotonic() - start)
+                if sleep_for > 0:
+                    time.sleep(sleep_for)
+        except Exception as e:
+            print(f"Error in video record loop: {e}")
+        finally:
+            sct.close()
+            # Deadline tercapai tanpa ada yang memanggil stop: flush +
+            # tutup writer dari sini, kalau tidak trailer container
+            # tidak pernah ditulis dan mp4-nya tidak bisa diputar
+            if not stop_event.is_set():
+                self.stop_video_recording(violation_id)
+
+    def _open_video_writer(self, filepath: str, width: int, height: int) -> tuple:
+        """
+        Buka writer video: coba H.264 via PyAV (hardware dulu),
+        fallback ke cv2.VideoWriter mp4v
+        """
+        try:
+            import av
+            for codec_name in _H264_CODECS:
+                container = None
+                try:
+                    container = av.open(filepath, 'w')
+                    stream = container.add_stream(codec_name, rate=self.video_fps)
+                    stream.width = width
+                    stream.height = height
+                    stream.pix_fmt = 'yuv420p'
+                    return ('av', container, stream)
+                except Exception:
+                    if container is not None:
+                        try:
+                            container.close()
+                        except Exception:
+                            pass
+        except ImportError:
+            pass
+
         fourcc = cv2.VideoWriter_fourcc(*'mp4v')
         writer = cv2.VideoWriter(filepath, fourcc, self.video_fps, (width, height))
-        
-        self.video_writers[violation_id] = writer
-        self.video_frames[violation_id] = deque(maxlen=int(self.video_fps * duration))
-    
+        return ('cv2', writer, None)
+
     def add_video_frame(self, violation_id: str, frame: np.ndarray):
         """Add frame ke video recording"""
-        if violation_id in self.video_writers:
-            self.video_writers[violation_id].write(frame)
-            self.video_frames[violation_id].append(datetime.utcnow())
-    
+        entry = self.video_writers.get(violation_id)
+        if entry is None:
+            return
+
+        kind, handle, stream = entry
+        if kind == 'av':
+            import av
+            video_frame = av.VideoFrame.from_ndarray(frame, format='bgr24')
+            for packet in stream.encode(video_frame):
+                handle.mux(packet)
+        else:
+            handle.write(frame)
+        self.video_frames[violation_id] += 1
+
     def stop_video_recording(self, violation_id: str) -> Optional[str]:
         """
         Stop recording dan return filepath
-        
+
         Args:
             violation_id: ID violation
-        
+
         Returns:
             Path ke video file
         """
-        if violation_id not in self.video_writers:
+        # Hentikan thread perekam dulu supaya tidak ada frame yang
+        # ditulis setelah writer ditutup
+        stop_event = self._record_stops.pop(violation_id, None)
+        if stop_event is not None:
+            stop_event.set()
+        thread = self._record_threads.pop(violation_id, None)
+        if thread is not None and thread is not threading.current_thread():
+            # Jangan join diri sendiri: thread perekam juga lewat sini
+            # saat menutup recording yang habis durasinya
+            thread.join(timeout=2.0)
+
+        entry = self.video_writers.pop(violation_id, None)
+        if entry is None:
             return None
-        
-        writer = self.video_writers[violation_id]
-        writer.release()
-        
-        # Get filepath from writer (if available)
-        # For now, we'll construct it
-        timestamp = datetime.utcnow().strftime("%Y%m%d_%H%M%S")
-        filename = f"video_{violation_id}_{timestamp}.mp4"
-        filepath = os.path.join(self.evidence_dir, filename)
-        
-        del self.video_writers[violation_id]
-        if violation_id in self.video_frames:
-            del self.video_frames[violation_id]
-        
-        return filepath if os.path.exists(filepath) else None
+
+        kind, handle, stream = entry
+        if kind == 'av':
+            try:
+                # Flush sisa frame dari encoder sebelum container ditutup
+                for packet in stream.encode(None):
+                    handle.mux(packet)
+            finally:
+                handle.close()
+        else:
+            handle.release()
+
+        filepath = self.video_paths.pop(violation_id, None)
+        self.video_frames.pop(violation_id, None)
+
+        if filepath and os.path.exists(filepath):
+            return filepath
+        return None
     
     def capture_violation_evidence(self, violation_id: str, 
                                    violation_type: str) -> Dict[str, str]:
@@ -129,7 +330,7 @@ class EvidenceCapture:
         
         # Capture screenshot
         screenshot_path = self.capture_screenshot(
-            f"screenshot_{violation_id}_{violation_type}.png"
+            f"screenshot_{violation_id}_{violation_type}.{self.image_format}"
         )
         if screenshot_path:
             evidence['screenshot'] = screenshot_path
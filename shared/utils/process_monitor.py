@@ -1,148 +1,443 @@
 """
 Monitor untuk proses yang berjalan
 """
+import os
+import re
+import socket
+import struct
+from array import array
 import psutil
 import platform
 from typing import List, Set, Dict
 import threading
 import time
 
+from .system_utils import SystemUtils
+
+# Di Linux baca /proc langsung: process_iter() menghidrasi banyak field
+# per proses (termasuk readlink exe yang tidak kita pakai), sedangkan
+# satu read /proc/<pid>/comm cukup untuk dapat nama proses
+_IS_LINUX = platform.system() == "Linux"
+
+# Konstanta proc connector (linux/netlink.h, linux/cn_proc.h): kernel
+# mengirim event exec lewat netlink, jadi app terlarang terdeteksi saat
+# start, bukan maksimal check_interval kemudian
+_NETLINK_CONNECTOR = 11
+_CN_IDX_PROC = 1
+_CN_VAL_PROC = 1
+_PROC_CN_MCAST_LISTEN = 1
+_PROC_EVENT_EXEC = 0x00000002
+_NLMSG_DONE = 3
+
+# Snapshot hasil scan proses yang dishare antar instance monitor:
+# beberapa monitor yang jalan bersamaan cukup satu walk /proc per
+# jendela TTL, bukan satu walk per monitor
+_SNAPSHOT = {'t': 0.0, 'data': None}
+_SNAPSHOT_LOCK = threading.Lock()
+
 
 class ProcessMonitor:
     """Monitor untuk proses aplikasi"""
-    
+
     def __init__(self, allowed_apps: List[str] = None, blocked_apps: List[str] = None):
         """
         Initialize process monitor
-        
+
         Args:
             allowed_apps: List aplikasi yang diizinkan (whitelist)
             blocked_apps: List aplikasi yang diblokir (blacklist)
         """
         self.allowed_apps = set(allowed_apps or [])
         self.blocked_apps = set(blocked_apps or [])
+
+        # Kedua list di-compile jadi satu regex alternasi: satu search()
+        # di engine C per nama proses, bukan loop substring Python
+        # O(jumlah pattern) setiap cycle
+        self._blocked_re = self._compile_patterns(self.blocked_apps)
+        self._allowed_re = self._compile_patterns(self.allowed_apps)
+
+        # Prefilter bitmask 64-bit per pattern blocked: substring match
+        # mensyaratkan semua karakter pattern ada di nama, jadi satu
+        # subset-test integer bisa menolak mayoritas nama tanpa regex.
+        # _blk_common = bit yang disyaratkan SEMUA pattern (cek tunggal)
+        self._blk_masks = [self._char_mask(b.lower())
+                           for b in sorted(self.blocked_apps)]
+        self._blk_common = self._blk_masks[0] if self._blk_masks else 0
+        for mask in self._blk_masks[1:]:
+            self._blk_common &= mask
         self.is_running = False
         self.monitoring_thread = None
         self.check_interval = 2.0
-        
+        # Event sebagai primitif tidur: stop() membangunkan loop saat
+        # itu juga, bukan menunggu sisa interval
+        self._stop_event = threading.Event()
+        # Socket netlink aktif (mode event), supaya stop() bisa
+        # membangunkan recv() dengan menutupnya
+        self._event_sock = None
+
         # Callbacks
         self.violation_callback = None
-        
-        # Tracked processes
-        self.tracked_processes: Dict[str, psutil.Process] = {}
-    
+
+        # Tracked processes dalam layout struct-of-arrays: array pid C
+        # (4 byte/entry) + list nama paralel, bukan dict objek Python
+        # per proses. psutil.Process dibuat lazy saat dibutuhkan
+        self._pids = array('i')
+        self._names: List[str] = []
+
+        # Cache pid -> nama dari cycle sebelumnya: proses yang tidak
+        # berubah (mayoritas) tidak perlu dicek _is_blocked ulang
+        self._pid_seen: Dict[int, str] = {}
+
     def set_violation_callback(self, callback):
         """Set callback untuk violation"""
         self.violation_callback = callback
-    
+
     def start(self):
         """Start monitoring"""
         if self.is_running:
             return
-        
+
         self.is_running = True
+        self._stop_event.clear()
         self.monitoring_thread = threading.Thread(target=self._monitoring_loop, daemon=True)
         self.monitoring_thread.start()
-    
+
     def stop(self):
         """Stop monitoring"""
         self.is_running = False
+        self._stop_event.set()
+        # Mode event: tutup socket supaya recv() langsung bangun tanpa
+        # menunggu timeout-nya
+        sock = self._event_sock
+        if sock is not None:
+            try:
+                sock.close()
+            except OSError:
+                pass
         if self.monitoring_thread:
             self.monitoring_thread.join(timeout=2)
-    
+
     def _monitoring_loop(self):
         """Main monitoring loop"""
+        # Mode event-driven kalau proc connector bisa dipakai (Linux,
+        # butuh CAP_NET_ADMIN/root); kalau tidak, polling seperti biasa
+        if _IS_LINUX and self._event_loop():
+            return
+
         while self.is_running:
             try:
                 self._check_processes()
-                time.sleep(self.check_interval)
+                if self._stop_event.wait(self.check_interval):
+                    break
             except Exception as e:
                 print(f"Error in process monitoring: {e}")
-                time.sleep(1)
-    
+                if self._stop_event.wait(1):
+                    break
+
+    def _open_proc_events(self):
+        """Buka socket netlink proc connector (None kalau tidak bisa)"""
+        try:
+            sock = socket.socket(
+                socket.AF_NETLINK, socket.SOCK_DGRAM, _NETLINK_CONNECTOR
+            )
+            sock.bind((os.getpid(), _CN_IDX_PROC))
+            # nlmsghdr + cn_msg + op PROC_CN_MCAST_LISTEN
+            op = struct.pack('=I', _PROC_CN_MCAST_LISTEN)
+            cn_msg = struct.pack(
+                '=IIIIHH', _CN_IDX_PROC, _CN_VAL_PROC, 0, 0, len(op), 0
+            )
+            payload = cn_msg + op
+            nl_hdr = struct.pack(
+                '=IHHII', 16 + len(payload), _NLMSG_DONE, 0, 0, os.getpid()
+            )
+            sock.send(nl_hdr + payload)
+            return sock
+        except (OSError, AttributeError):
+            return None
+
+    def _event_loop(self) -> bool:
+        """
+        Loop event-driven via proc connector
+
+        Thread blocking di recv() dan baru bangun saat ada exec baru:
+        deteksi sub-milidetik dan ~0% CPU di antara event, plus tidak
+        ada app blocked yang lolos karena hidup lebih pendek dari
+        interval polling. Sweep penuh tetap jalan berkala untuk
+        tracked_processes dan proses yang sudah jalan sebelum start.
+
+        Returns:
+            True kalau mode event dipakai; False = fallback polling
+        """
+        sock = self._open_proc_events()
+        if sock is None:
+            return False
+
+        self._event_sock = sock
+        sock.settimeout(self.check_interval)
+        sweep_interval = self.check_interval * 5
+        last_sweep = 0.0
+
+        try:
+            while self.is_running:
+                now = time.monotonic()
+                if now - last_sweep >= sweep_interval:
+                    # Error handling sama seperti loop polling: callback
+                    # yang raise tidak boleh mematikan thread monitor
+                    try:
+                        self._check_processes()
+                    except Exception as e:
+                        print(f"Error in process monitoring: {e}")
+                    last_sweep = now
+                try:
+                    data = sock.recv(1024)
+                except socket.timeout:
+                    continue
+                except OSError as e:
+                    if not self.is_running:
+                        break
+                    # ENOBUFS dkk: buffer netlink bisa meluap saat burst
+                    # exec. Jangan matikan monitor -- subscribe ulang,
+                    # dan kalau itu pun gagal jatuh ke loop polling
+                    print(f"Error in process monitoring: {e}")
+                    sock.close()
+                    sock = self._open_proc_events()
+                    self._event_sock = sock
+                    if sock is None:
+                        return False
+                    sock.settimeout(self.check_interval)
+                    continue
+                try:
+                    self._handle_proc_event(data)
+                except Exception as e:
+                    print(f"Error in process monitoring: {e}")
+        finally:
+            self._event_sock = None
+            if sock is not None:
+                try:
+                    sock.close()
+                except OSError:
+                    pass
+        return True
+
+    def _handle_proc_event(self, data: bytes):
+        """Proses satu pesan netlink; hanya peduli PROC_EVENT_EXEC"""
+        # Layout: nlmsghdr (16) + cn_msg (20) + proc_event
+        # proc_event: what (4) + cpu (4) + timestamp_ns (8) + union
+        if len(data) < 56:
+            return
+        what = struct.unpack_from('=I', data, 36)[0]
+        if what != _PROC_EVENT_EXEC:
+            return
+        pid = struct.unpack_from('=I', data, 52)[0]
+
+        try:
+            with open(f'/proc/{pid}/comm') as f:
+                proc_name = f.read().rstrip('\n').lower()
+        except OSError:
+            return
+
+        if self._is_blocked(proc_name):
+            if self.violation_callback:
+                self.violation_callback({
+                    'type': 'application_blocked',
+                    'process_name': proc_name,
+                    'pid': pid,
+                    'description': f"Aplikasi terlarang terdeteksi: {proc_name}"
+                })
+            SystemUtils.fast_kill(pid)
+
+    @classmethod
+    def snapshot(cls, ttl_ms: float = 500) -> List[tuple]:
+        """
+        List (pid, nama-lowercase) semua proses, di-cache dengan TTL
+
+        Pemanggil kedua dalam jendela ttl_ms mendapat list yang sama
+        tanpa scan ulang; aman dishare lintas instance/thread.
+        """
+        now = time.monotonic()
+        with _SNAPSHOT_LOCK:
+            data = _SNAPSHOT['data']
+            if data is not None and (now - _SNAPSHOT['t']) * 1000.0 < ttl_ms:
+                return data
+
+        data = list(cls._iter_processes())
+        with _SNAPSHOT_LOCK:
+            _SNAPSHOT['t'] = time.monotonic()
+            _SNAPSHOT['data'] = data
+        return data
+
+    @staticmethod
+    def _iter_processes():
+        """
+        Yield (pid, nama-lowercase) semua proses yang berjalan
+
+        Linux: scan /proc dan baca comm saja (satu open/read kecil per
+        proses). Platform lain: psutil.process_iter dengan field minimal.
+        """
+        if _IS_LINUX:
+            # scandir membawa d_type dari satu getdents (tanpa stat per
+            # entry). comm dibaca lewat os.open/os.read mentah: tanpa
+            # objek file + buffering Python di loop yang jalan ratusan
+            # kali per cycle. Fungsi os di-hoist ke lokal supaya tiap
+            # iterasi tidak membayar lookup atribut modul
+            _open, _read, _close = os.open, os.read, os.close
+            _rdonly = os.O_RDONLY
+            with os.scandir('/proc') as it:
+                for entry in it:
+                    n = entry.name
+                    if n[0] < '0' or n[0] > '9':
+                        continue
+                    try:
+                        fd = _open('/proc/' + n + '/comm', _rdonly)
+                    except OSError:
+                        # Proses sudah mati di antara scandir dan open
+                        continue
+                    try:
+                        raw = _read(fd, 64)
+                    finally:
+                        _close(fd)
+                    name = raw.rstrip(b'\n').decode('ascii', 'ignore').lower()
+                    yield int(n), name
+        else:
+            for proc in psutil.process_iter(['pid', 'name']):
+                try:
+                    info = proc.info
+                    yield info['pid'], info['name'].lower()
+                except (psutil.NoSuchProcess, psutil.AccessDenied):
+                    continue
+
     def _check_processes(self):
         """Check semua proses yang berjalan"""
-        current_processes = {}
-        
-        for proc in psutil.process_iter(['pid', 'name', 'exe']):
-            try:
-                proc_info = proc.info
-                proc_name = proc_info['name'].lower()
-                
-                # Check blocked apps
-                if self._is_blocked(proc_name):
-                    if self.violation_callback:
-                        self.violation_callback({
-                            'type': 'application_blocked',
-                            'process_name': proc_name,
-                            'pid': proc_info['pid'],
-                            'description': f"Aplikasi terlarang terdeteksi: {proc_name}"
-                        })
-                    
-                    # Kill process
-                    try:
-                        proc.kill()
-                    except:
-                        pass
-                
-                # Track process
-                current_processes[proc_name] = proc
-            except (psutil.NoSuchProcess, psutil.AccessDenied):
+        # Tanpa whitelist/blacklist tidak ada yang bisa dilanggar:
+        # jangan scan ~300 pid tiap bangun hanya untuk bookkeeping.
+        # Snapshot untuk get_running_processes dibuat on-demand di sana
+        if not self.blocked_apps and not self.allowed_apps:
+            return
+
+        new_pids = array('i')
+        new_names = []
+        new_seen = {}
+
+        for pid, proc_name in self.snapshot():
+            # Pid dengan nama yang sama di cycle lalu sudah lolos cek;
+            # di sistem steady-state ini hampir semua proses
+            if self._pid_seen.get(pid) == proc_name:
+                new_seen[pid] = proc_name
+                new_pids.append(pid)
+                new_names.append(proc_name)
                 continue
-        
-        self.tracked_processes = current_processes
-    
+
+            # Check blocked apps
+            if self._is_blocked(proc_name):
+                if self.violation_callback:
+                    self.violation_callback({
+                        'type': 'application_blocked',
+                        'process_name': proc_name,
+                        'pid': pid,
+                        'description': f"Aplikasi terlarang terdeteksi: {proc_name}"
+                    })
+
+                # Kill process (os.kill/TerminateProcess langsung)
+                SystemUtils.fast_kill(pid)
+            else:
+                # Hanya proses yang lolos yang masuk cache: kill yang
+                # gagal tetap dicek (dan dilaporkan) lagi cycle depan
+                new_seen[pid] = proc_name
+
+            # Track process
+            new_pids.append(pid)
+            new_names.append(proc_name)
+
+        # Ganti cache: pid yang mati otomatis hilang
+        self._pid_seen = new_seen
+        self._pids = new_pids
+        self._names = new_names
+
+    @staticmethod
+    def _compile_patterns(apps: Set[str]):
+        """Compile set nama app jadi satu regex alternasi (None jika kosong)"""
+        if not apps:
+            return None
+        return re.compile('|'.join(
+            re.escape(app.lower()) for app in sorted(apps)
+        ))
+
+    @staticmethod
+    def _char_mask(s: str) -> int:
+        """Bitmask 64-bit dari karakter string (bit = ord(c) & 63)"""
+        mask = 0
+        for c in s:
+            mask |= 1 << (ord(c) & 63)
+        return mask
+
     def _is_blocked(self, proc_name: str) -> bool:
-        """Check if process is blocked"""
+        """Check if process is blocked (proc_name sudah lowercase)"""
         # Check blacklist
-        if self.blocked_apps:
-            for blocked in self.blocked_apps:
-                if blocked.lower() in proc_name:
-                    return True
-        
-        # Check whitelist (jika ada whitelist, hanya yang di whitelist yang diizinkan)
-        if self.allowed_apps:
-            is_allowed = False
-            for allowed in self.allowed_apps:
-                if allowed.lower() in proc_name:
-                    is_allowed = True
-                    break
-            if not is_allowed:
+        if self._blocked_re is not None:
+            q = self._char_mask(proc_name)
+            # Dua lapis tolak-cepat sebelum regex: bit wajib semua
+            # pattern (satu AND), lalu subset-test per pattern
+            if ((self._blk_common & q) == self._blk_common
+                    and any((m & q) == m for m in self._blk_masks)
+                    and self._blocked_re.search(proc_name)):
                 return True
-        
+
+        # Check whitelist (jika ada whitelist, hanya yang di whitelist yang diizinkan)
+        if self._allowed_re is not None and not self._allowed_re.search(proc_name):
+            return True
+
         return False
-    
+
+    @property
+    def tracked_processes(self) -> Dict[str, int]:
+        """View dict nama -> pid (dibangun on-demand dari arrays)"""
+        return dict(zip(self._names, self._pids))
+
+    def _tracked_snapshot(self) -> List[tuple]:
+        """
+        Pasangan (nama, pid) proses yang ter-track
+
+        Kalau monitor jalan tanpa aturan, _check_processes tidak mengisi
+        arrays; scan segar dilakukan di sini on-demand.
+        """
+        if self._names:
+            return list(zip(self._names, self._pids))
+        return [(name, pid) for pid, name in self.snapshot()]
+
     def get_running_processes(self) -> List[Dict]:
         """Get list of running processes"""
         processes = []
-        for name, proc in self.tracked_processes.items():
+        for name, pid in self._tracked_snapshot():
             try:
-                processes.append({
-                    'name': name,
-                    'pid': proc.pid,
-                    'status': proc.status()
-                })
-            except:
+                proc = psutil.Process(pid)
+                # oneshot: semua atribut proses dibaca dari satu parse
+                # /proc/<pid>/stat, bukan satu parse per atribut
+                with proc.oneshot():
+                    processes.append({
+                        'name': name,
+                        'pid': pid,
+                        'status': proc.status()
+                    })
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
                 pass
         return processes
-    
+
     def kill_process(self, pid: int) -> bool:
         """Kill process by PID"""
-        try:
-            proc = psutil.Process(pid)
-            proc.kill()
-            return True
-        except:
-            return False
-    
+        return SystemUtils.fast_kill(pid)
+
     def kill_process_by_name(self, name: str) -> bool:
         """Kill process by name"""
         killed = False
-        for proc_name, proc in self.tracked_processes.items():
-            if name.lower() in proc_name.lower():
-                try:
-                    proc.kill()
-                    killed = True
-                except:
-                    pass
+        name_lower = name.lower()
+        # _pid_seen (pid -> nama, hasil cycle terakhir) diwalk langsung:
+        # tanpa konstruksi psutil.Process dan tanpa syscall per non-match.
+        # Kalau cache kosong (monitor belum/baru jalan) pakai snapshot
+        if self._pid_seen:
+            candidates = list(self._pid_seen.items())
+        else:
+            candidates = [(pid, n) for n, pid in self._tracked_snapshot()]
+        for pid, proc_name in candidates:
+            if name_lower in proc_name and SystemUtils.fast_kill(pid):
+                killed = True
         return killed
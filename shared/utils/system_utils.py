@@ -1,11 +1,29 @@
 """
 System utilities untuk Windows/Linux
 """
+import functools
 import platform
+import signal
 import socket
 import os
 from typing import Optional
 
+# Platform tidak berubah selama proses hidup; platform.system() memanggil
+# uname tiap kali, cukup sekali di import
+_IS_WINDOWS = platform.system() == "Windows"
+
+# Prototype LockWorkStation di-resolve sekali: akses lewat
+# ctypes.windll.user32.X memicu GetProcAddress + inferensi signature
+# tiap panggilan
+if _IS_WINDOWS:
+    import ctypes
+    from ctypes import wintypes
+    _LockWorkStation = ctypes.WINFUNCTYPE(wintypes.BOOL)(
+        ('LockWorkStation', ctypes.windll.user32)
+    )
+else:
+    _LockWorkStation = None
+
 
 class SystemUtils:
     """Utilities untuk system operations"""
@@ -16,8 +34,15 @@ class SystemUtils:
         return socket.gethostname()
     
     @staticmethod
+    @functools.lru_cache(maxsize=1)
     def get_local_ip() -> str:
-        """Get local IP address"""
+        """
+        Get local IP address
+
+        Hasil di-cache: connect() UDP memicu lookup routing table di
+        kernel tiap panggilan, padahal IP jarang berubah di tengah
+        sesi. Panggil refresh_local_ip() kalau jaringan pindah.
+        """
         try:
             s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
             s.connect(("8.8.8.8", 80))
@@ -26,24 +51,84 @@ class SystemUtils:
             return ip
         except:
             return "127.0.0.1"
-    
+
+    @staticmethod
+    def refresh_local_ip() -> str:
+        """Buang cache IP lalu resolve ulang (setelah ganti jaringan)"""
+        SystemUtils.get_local_ip.cache_clear()
+        return SystemUtils.get_local_ip()
+
     @staticmethod
     def is_windows() -> bool:
         """Check if running on Windows"""
-        return platform.system() == "Windows"
-    
+        return _IS_WINDOWS
+
     @staticmethod
+    @functools.lru_cache(maxsize=1)
     def is_admin() -> bool:
-        """Check if running as admin/root"""
+        """Check if running as admin/root (di-cache, status tidak berubah)"""
         if SystemUtils.is_windows():
+            # Baca TokenElevation dari token proses sendiri: jalur
+            # langsung, bukan wrapper shell32.IsUserAnAdmin yang
+            # membandingkan SID string di belakang layar
             try:
                 import ctypes
-                return ctypes.windll.shell32.IsUserAnAdmin() != 0
+                from ctypes import wintypes
+                advapi32 = ctypes.windll.advapi32
+                kernel32 = ctypes.windll.kernel32
+                TOKEN_QUERY = 0x0008
+                TOKEN_ELEVATION = 20
+
+                token = wintypes.HANDLE()
+                if not advapi32.OpenProcessToken(
+                    kernel32.GetCurrentProcess(), TOKEN_QUERY,
+                    ctypes.byref(token)
+                ):
+                    return False
+                try:
+                    elevation = wintypes.DWORD()
+                    ret_len = wintypes.DWORD()
+                    ok = advapi32.GetTokenInformation(
+                        token, TOKEN_ELEVATION, ctypes.byref(elevation),
+                        ctypes.sizeof(elevation), ctypes.byref(ret_len)
+                    )
+                    return bool(ok) and elevation.value != 0
+                finally:
+                    kernel32.CloseHandle(token)
             except:
                 return False
         else:
             return os.geteuid() == 0
     
+    @staticmethod
+    def fast_kill(pid: int) -> bool:
+        """
+        Kill proses langsung via primitif OS
+
+        Tanpa bookkeeping psutil (cek pid-reuse, cache create_time) --
+        aman untuk pid yang baru saja diobservasi di iterasi yang sama.
+
+        Returns:
+            True kalau sinyal/terminate berhasil dikirim
+        """
+        if SystemUtils.is_windows():
+            import ctypes
+            PROCESS_TERMINATE = 0x0001
+            kernel32 = ctypes.windll.kernel32
+            handle = kernel32.OpenProcess(PROCESS_TERMINATE, False, pid)
+            if not handle:
+                return False
+            try:
+                return bool(kernel32.TerminateProcess(handle, 1))
+            finally:
+                kernel32.CloseHandle(handle)
+        else:
+            try:
+                os.kill(pid, signal.SIGKILL)
+                return True
+            except (ProcessLookupError, PermissionError):
+                return False
+
     @staticmethod
     def block_shortcuts(block: bool = True):
         """Block keyboard shortcuts (Windows only)"""
@@ -68,7 +153,15 @@ class SystemUtils:
     def lock_screen():
         """Lock the screen"""
         if SystemUtils.is_windows():
-            import ctypes
-            ctypes.windll.user32.LockWorkStation()
+            _LockWorkStation()
         else:
-            os.system("gnome-screensaver-command -l")
+            # Popen langsung, tanpa fork shell seperti os.system;
+            # loginctl bekerja lintas desktop environment systemd
+            import subprocess
+            for cmd in (['loginctl', 'lock-session'],
+                        ['gnome-screensaver-command', '-l']):
+                try:
+                    subprocess.Popen(cmd, close_fds=True)
+                    break
+                except FileNotFoundError:
+                    continue